@@ -3,13 +3,19 @@ This script leverages play-by-play and box score
 data to infer which players are on the court
 at all times
 """
-from typing import List, Tuple
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
 import pandas as pd
 
 import data
 import utils
 
+# Run logging.basicConfig(level=logging.DEBUG) before calling into this
+# module to surface substitution tracing from utils
+logger = logging.getLogger(__name__)
+
 def get_rosters(home_team_id: int, visitor_team_id: int, box_score_df: pd.DataFrame) -> Tuple[List[int], List[int]]:
     """
     Get the rosters for the home and visitor teams.
@@ -22,10 +28,10 @@ def get_rosters(home_team_id: int, visitor_team_id: int, box_score_df: pd.DataFr
     Returns:
         pd.DataFrame: DataFrame containing player IDs for both teams.
     """
-    home_roster = box_score_df[box_score_df['team_id'] == home_team_id]
-    visitor_roster = box_score_df[box_score_df['team_id'] == visitor_team_id]
+    # Partition the box score by team in a single pass
+    rosters = box_score_df.groupby('team_id')['player_id'].apply(list)
 
-    return list(home_roster['player_id']), list(visitor_roster['player_id'])
+    return rosters.get(home_team_id, []), rosters.get(visitor_team_id, [])
 
 
 def derive_on_court_data(game_id: int) -> pd.DataFrame:
@@ -72,3 +78,24 @@ def derive_on_court_data(game_id: int) -> pd.DataFrame:
     )
 
     return player_on_court_df
+
+
+def run_many(game_ids: List[int], workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Process multiple games in parallel worker processes.
+
+    Args:
+        game_ids (List[int]): The IDs of the games to process.
+        workers (Optional[int]): Number of worker processes;
+            defaults to the machine's CPU count.
+
+    Returns:
+        pd.DataFrame: DataFrame containing players on the court
+            at each timestamp across all requested games.
+    """
+
+    # Games are independent, so fan out across processes and combine once
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        game_dfs = list(executor.map(derive_on_court_data, game_ids))
+
+    return pd.concat(game_dfs, ignore_index=True)
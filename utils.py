@@ -4,155 +4,293 @@ data to infer which players are on the court
 at all times
 """
 
+import logging
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
+from numba import njit
+
+logger = logging.getLogger(__name__)
 
 
-def play_clock_to_seconds(play_clock: str, period: int) -> int:
+def play_clock_to_seconds_vec(play_clock: pd.Series, period: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Convert play clock time from "MM:SS" format to total seconds.
+    Convert play clock times from "MM:SS" format to total game
+    seconds remaining, vectorized over full play-by-play columns.
 
     Args:
-        play_clock (str): Time in "MM:SS" format.
-        period (int): Current period of the game.
-    
+        play_clock (pd.Series): Times in "MM:SS" format.
+        period (pd.Series): Current period of the game for each event.
+
     Returns:
-        int: Total seconds.
-        max_period_time (int): Time remaining at the beginning of the
-            period in seconds.
+        np.ndarray: Total game time remaining in seconds.
+        np.ndarray: Time remaining at the beginning of each
+            event's period in seconds.
     """
 
-    # Split time string
-    pc_split = play_clock.split(":")
+    # Split time strings into minute/second columns in one pass
+    pc_split = play_clock.str.split(":", expand=True)
+    minutes = pc_split[0].astype(np.int64).to_numpy()
+    seconds = pc_split[1].astype(np.float64).to_numpy()
 
-    # Convert to seconds
-    minutes = int(pc_split[0])
-    seconds = float(pc_split[1])
-
-    # Account for the quarter to get total game time remaining
-    if period <= 4:
-        period_time = 10 * (4 - period) * 60
-        max_period_time = 10 * (5 - period) * 60
-    else:
-        period_time = 5 * (4 - period) * 60
-        max_period_time = 5 * (5 - period) * 60
+    # Account for the quarter (600s) or overtime (300s) to get total game time remaining
+    p = period.to_numpy()
+    period_length = np.where(p <= 4, 600, 300)
+    period_time = period_length * (4 - p)
+    max_period_time = period_length * (5 - p)
 
     return period_time + (minutes * 60 + seconds), max_period_time
 
 
-def process_pbp_data(pbp_df: pd.DataFrame, home_roster: pd.DataFrame, visitor_roster: pd.DataFrame, home_id: int, visitor_id: int) -> pd.DataFrame:
+@njit(cache=True)
+def _run_substitution_loop(relevant_events, eventmsgtype, is_home_sub, player1_code, player2_code, player3_code,
+                           game_time_remaining, max_period_time, is_home_player,
+                           sub_times, sub_time_counts, n_players):
     """
-    Process play-by-play data to infer player court
-    presence using substitution logic.
+    JIT-compiled substitution state machine over code-encoded
+    play-by-play arrays.
 
     Args:
-        pbp_df (pd.DataFrame): Play-by-play data.
-        home_roster (pd.DataFrame): Home team roster.
-        visitor_roster (pd.DataFrame): Visitor team roster.
-        home_id (int): Home team ID.
-        visitor_id (int): Visitor team ID.
-    
+        relevant_events (np.ndarray): Indices of events that can change lineup state.
+        eventmsgtype (np.ndarray): Event type per event.
+        is_home_sub (np.ndarray): Whether each substitution is by the home team.
+        player1_code (np.ndarray): Roster code of player 1 per event (-1 if absent).
+        player2_code (np.ndarray): Roster code of player 2 per event (-1 if absent).
+        player3_code (np.ndarray): Roster code of player 3 per event (-1 if absent).
+        game_time_remaining (np.ndarray): Game time remaining per event.
+        max_period_time (np.ndarray): Period start time per event.
+        is_home_player (np.ndarray): Whether each roster code is a home player.
+        sub_times (np.ndarray): Sub-in times per roster code, padded.
+        sub_time_counts (np.ndarray): Number of valid sub-in times per roster code.
+        n_players (int): Number of roster codes.
+
     Returns:
-        pd.DataFrame: Substitution DataFrame.
-        pd.DataFrame: Updated play-by-play data sorted
-            in order of game time remaining.
+        np.ndarray: Accumulated playing time per roster code.
+        np.ndarray: Roster code of each completed stint.
+        np.ndarray: Sub-in time of each completed stint.
+        np.ndarray: Sub-out time of each completed stint.
     """
-    # Initialize objects
-    home_on_court = []
-    visitor_on_court = []
-    period = 1
-
-    # Initialize game time remaining
-    pbp_df["game_time_remaining"] = [play_clock_to_seconds(x, y)[0] for x, y in zip(pbp_df["pctimestring"], pbp_df["period"])]
-    pbp_df = pbp_df.sort_values(by=["game_time_remaining", "period", "eventnum"], ascending=[False, True, True]).reset_index(drop=True)
-
-    # Initialize playing time bank
-    time_on_court = {}
-    for player_id in home_roster + visitor_roster:
-        time_on_court[player_id] = {"playing_time": 0, "time_in": None, "time_in_list": [], "time_out_list": []}
-
-    for index, row in pbp_df.iterrows():
-        # Get game time remaining
-        game_time_remaining, max_period_time = play_clock_to_seconds(row["pctimestring"], row["period"])
+    # Initialize the playing time bank as parallel arrays indexed by roster code
+    playing_time = np.zeros(n_players)
+    time_in = np.full(n_players, np.nan)
+    home_on_court = np.zeros(n_players, np.bool_)
+    visitor_on_court = np.zeros(n_players, np.bool_)
+    home_count = 0
+    visitor_count = 0
+
+    # Completed stints accumulate as preallocated flat parallel arrays, one
+    # row per (player, time_in, time_out), filled whenever a stint closes;
+    # every stint matches either an opened one (at most three per event) or a
+    # sub-out with no recorded entry (at most one per event), so four rows per
+    # event bounds the total
+    capacity = 4 * eventmsgtype.shape[0] + 1
+    stint_codes = np.empty(capacity, np.int64)
+    stint_times_in = np.empty(capacity)
+    stint_times_out = np.empty(capacity)
+    n_stints = 0
+
+    for index in relevant_events:
+        gtr = game_time_remaining[index]
+        mpt = max_period_time[index]
         # For substitutions, update on-court players
-        if row["eventmsgtype"] == 8:
+        if eventmsgtype[index] == 8:
+            player1 = player1_code[index]
+            player2 = player2_code[index]
             # Removing and adding the player to the proper team
-            if row["player1_team_id"] == home_id:
-                if row["player1_id"] in home_on_court:
-                    home_on_court.remove(row["player1_id"])
-                if row["player2_id"] not in home_on_court:
-                    home_on_court.append(row["player2_id"])
+            if is_home_sub[index]:
+                if player1 >= 0 and home_on_court[player1]:
+                    home_on_court[player1] = False
+                    home_count -= 1
+                if player2 >= 0 and not home_on_court[player2]:
+                    home_on_court[player2] = True
+                    home_count += 1
             else:
-                if row["player1_id"] in visitor_on_court:
-                    visitor_on_court.remove(row["player1_id"])
-                if row["player2_id"] not in visitor_on_court:
-                    visitor_on_court.append(row["player2_id"])
+                if player1 >= 0 and visitor_on_court[player1]:
+                    visitor_on_court[player1] = False
+                    visitor_count -= 1
+                if player2 >= 0 and not visitor_on_court[player2]:
+                    visitor_on_court[player2] = True
+                    visitor_count += 1
 
             # Update playing time bank for player 1
             ## If we're missing a sub-in time, assume that the player has been in since the start of the period
             ## Otherwise, accumulate playing time from the "time_in" to the current game time remaining
-            if pd.isnull(time_on_court[row["player1_id"]]["time_in"]):
-                time_on_court[row["player1_id"]]["playing_time"] += (max_period_time - game_time_remaining)
-                time_on_court[row["player1_id"]]["time_in_list"].append(max_period_time)
-            else:
-                time_on_court[row["player1_id"]]["playing_time"] += (time_on_court[row["player1_id"]]["time_in"] - game_time_remaining)
+            if player1 >= 0:
+                # NaN self-inequality is a single FP compare; a -1.0 sentinel
+                # would collide with negative overtime game times
+                if time_in[player1] != time_in[player1]:
+                    playing_time[player1] += (mpt - gtr)
+                    stint_time_in = mpt
+                else:
+                    playing_time[player1] += (time_in[player1] - gtr)
+                    stint_time_in = time_in[player1]
 
-            # For removed players, null out their time_in and log time_out and period
-            time_on_court[row["player1_id"]]["time_in"] = None
-            time_on_court[row["player1_id"]]["time_out_list"].append(game_time_remaining)
+                # For removed players, null out their time_in and log the stint
+                time_in[player1] = np.nan
+                stint_codes[n_stints] = player1
+                stint_times_in[n_stints] = stint_time_in
+                stint_times_out[n_stints] = gtr
+                n_stints += 1
 
             # Update playing time bank for player 2 (entering the game)
-            time_on_court[row["player2_id"]]["time_in"] = game_time_remaining
-            time_on_court[row["player2_id"]]["time_in_list"].append(game_time_remaining)
-        elif row["eventmsgtype"] == 13:
-            # End of period - update playing time for all on-court players
-            for player_id in home_on_court + visitor_on_court:
-                time_on_court[player_id]["playing_time"] += (time_on_court[player_id]["time_in"] - game_time_remaining)
-                time_on_court[player_id]["time_in"] = None
-                time_on_court[player_id]["time_out_list"].append(game_time_remaining)
-
-            # Increment period and reset on-court players
-            period += 1
-            home_on_court = []
-            visitor_on_court = []
-        elif row["eventmsgtype"] <= 10:
+            if player2 >= 0:
+                time_in[player2] = gtr
+        elif eventmsgtype[index] == 13:
+            # End of period - update playing time for all on-court players,
+            # stopping once every tracked player has been flushed
+            remaining = home_count + visitor_count
+            for code in range(n_players):
+                if remaining == 0:
+                    break
+                if home_on_court[code] or visitor_on_court[code]:
+                    remaining -= 1
+                    playing_time[code] += (time_in[code] - gtr)
+                    stint_codes[n_stints] = code
+                    stint_times_in[n_stints] = time_in[code]
+                    stint_times_out[n_stints] = gtr
+                    n_stints += 1
+                    time_in[code] = np.nan
+
+            # Reset on-court players
+            home_on_court[:] = False
+            visitor_on_court[:] = False
+            home_count = 0
+            visitor_count = 0
+        elif eventmsgtype[index] <= 10:
             # For other events involving on-court action, ensure that all players involved are marked as on-court
-            for player_id in [row["player1_id"], row["player2_id"], row["player3_id"]]:
-                if pd.isnull(player_id):
+            for code in (player1_code[index], player2_code[index], player3_code[index]):
+                if code < 0:
+                    continue
+
+                # Skip players already logged as leaving or entering at this timestamp
+                subbed = False
+                for stint in range(n_stints):
+                    if stint_codes[stint] == code and stint_times_out[stint] == gtr:
+                        subbed = True
+                        break
+                for k in range(sub_time_counts[code]):
+                    if sub_times[code, k] == gtr:
+                        subbed = True
+                        break
+                if subbed:
                     continue
 
-                player_sub_times = list(set(pbp_df[(pbp_df["player2_id"] == player_id) & (pbp_df["eventmsgtype"]==8)]["game_time_remaining"]))
-
-                if player_id in home_roster and player_id not in home_on_court:
-                    if (row["game_time_remaining"] not in time_on_court[player_id]["time_out_list"]) and (row["game_time_remaining"] not in player_sub_times):
-                        if len(home_on_court) < 5:
-                            home_on_court.append(player_id)
-                            time_on_court[player_id]["time_in"] = max_period_time
-                            time_on_court[player_id]["time_in_list"].append(max_period_time)
-                elif player_id in visitor_roster and player_id not in visitor_on_court:
-                    if (row["game_time_remaining"] not in time_on_court[player_id]["time_out_list"]) and (row["game_time_remaining"] not in player_sub_times):
-                        if len(visitor_on_court) < 5:
-                            visitor_on_court.append(player_id)
-                            time_on_court[player_id]["time_in"] = max_period_time
-                            time_on_court[player_id]["time_in_list"].append(max_period_time)
+                if is_home_player[code]:
+                    if not home_on_court[code] and home_count < 5:
+                        home_on_court[code] = True
+                        home_count += 1
+                        time_in[code] = mpt
+                else:
+                    if not visitor_on_court[code] and visitor_count < 5:
+                        visitor_on_court[code] = True
+                        visitor_count += 1
+                        time_in[code] = mpt
+
+    return playing_time, stint_codes[:n_stints], stint_times_in[:n_stints], stint_times_out[:n_stints]
+
+
+def process_pbp_data(pbp_df: pd.DataFrame, home_roster: pd.DataFrame, visitor_roster: pd.DataFrame, home_id: int, visitor_id: int) -> pd.DataFrame:
+    """
+    Process play-by-play data to infer player court
+    presence using substitution logic.
+
+    Args:
+        pbp_df (pd.DataFrame): Play-by-play data.
+        home_roster (pd.DataFrame): Home team roster.
+        visitor_roster (pd.DataFrame): Visitor team roster.
+        home_id (int): Home team ID.
+        visitor_id (int): Visitor team ID.
+    
+    Returns:
+        pd.DataFrame: Substitution DataFrame.
+        pd.DataFrame: Updated play-by-play data sorted
+            in order of game time remaining.
+    """
+    # Initialize game time remaining and period start time
+    pbp_df["game_time_remaining"], pbp_df["max_period_time"] = play_clock_to_seconds_vec(pbp_df["pctimestring"], pbp_df["period"])
+    # Sort by game time remaining (descending) with period and event number as
+    # tiebreakers, encoded into a single int64 key so one argsort replaces a
+    # three-column lexsort; game times are scaled to tenths of a second, which
+    # covers the pctimestring resolution
+    game_time_tenths = (pbp_df["game_time_remaining"].to_numpy() * 10).astype(np.int64)
+    sort_key = (
+        -game_time_tenths * 10_000_000_000
+        + pbp_df["period"].to_numpy(dtype=np.int64) * 1_000_000
+        + pbp_df["eventnum"].to_numpy(dtype=np.int64)
+    )
+    pbp_df = pbp_df.iloc[np.argsort(sort_key, kind="stable")].reset_index(drop=True)
+
+    # Map each roster player to a contiguous code so the JIT-compiled loop
+    # can track state in flat arrays indexed by code
+    player_codes = {}
+    for player_id in list(home_roster) + list(visitor_roster):
+        if player_id not in player_codes:
+            player_codes[player_id] = len(player_codes)
+    n_players = len(player_codes)
+    is_home_player = np.zeros(n_players, dtype=np.bool_)
+    for player_id in home_roster:
+        is_home_player[player_codes[player_id]] = True
+
+    # Extract the hot columns once as NumPy arrays, encoding player IDs as
+    # roster codes (-1 for missing or non-roster players)
+    def encode_players(player_ids):
+        # One vectorized NaN mask up front, so only filled slots hit the dict
+        codes = np.full(len(player_ids), -1, dtype=np.int32)
+        for index in np.flatnonzero(~np.isnan(player_ids)):
+            codes[index] = player_codes.get(player_ids[index], -1)
+        return codes
+
+    eventmsgtype = pbp_df["eventmsgtype"].to_numpy(dtype=np.int16)
+    is_home_sub = pbp_df["player1_team_id"].to_numpy() == home_id
+    player1_code = encode_players(pbp_df["player1_id"].to_numpy())
+    player2_code = encode_players(pbp_df["player2_id"].to_numpy())
+    player3_code = encode_players(pbp_df["player3_id"].to_numpy())
+    game_time_remaining = pbp_df["game_time_remaining"].to_numpy(dtype=np.float64)
+    max_period_time = pbp_df["max_period_time"].to_numpy(dtype=np.float64)
+
+    # Pre-collect sub-in times per player so the loop doesn't re-filter the frame
+    sub_mask = eventmsgtype == 8
+    sub_time_counts = np.zeros(n_players, dtype=np.int32)
+    sub_times = np.full((n_players, max(sub_mask.sum(), 1)), np.nan)
+    for code, sub_time in zip(player2_code[sub_mask], game_time_remaining[sub_mask]):
+        if code >= 0:
+            sub_times[code, sub_time_counts[code]] = sub_time
+            sub_time_counts[code] += 1
+
+    # Most events cannot change lineup state: only substitutions, period ends,
+    # and on-court events naming at least one roster player matter, so the
+    # compiled loop walks just those
+    has_roster_player = (player1_code >= 0) | (player2_code >= 0) | (player3_code >= 0)
+    relevant_events = np.flatnonzero(
+        (eventmsgtype == 8) | (eventmsgtype == 13) | ((eventmsgtype <= 10) & has_roster_player)
+    )
+
+    # Run the state machine in compiled code
+    _, stint_codes, stint_times_in, stint_times_out = _run_substitution_loop(
+        relevant_events, eventmsgtype, is_home_sub, player1_code, player2_code, player3_code,
+        game_time_remaining, max_period_time, is_home_player,
+        sub_times, sub_time_counts, n_players
+    )
 
     # Create substitution DataFrame
-    ## This includes all the sub-in and sub-out times for each player
-    sub_df = pd.DataFrame()
-    for player_id in time_on_court:
-        if player_id in home_roster:
-            team_id = home_id
-        else:
-            team_id = visitor_id
-
-        temp_df = pd.DataFrame(
-            {
-                "player_id": [player_id] * len(time_on_court[player_id]["time_in_list"]),
-                "team_id": [team_id] * len(time_on_court[player_id]["time_in_list"]),
-                "time_in": time_on_court[player_id]["time_in_list"],
-                "time_out": time_on_court[player_id]["time_out_list"],
-            }
-        )
-        sub_df = pd.concat([sub_df, temp_df], ignore_index=True)
+    ## This includes all the sub-in and sub-out times for each player,
+    ## decoded straight from the flat stint lists in one constructor call
+    player_id_of_code = np.empty(n_players, dtype=np.int64)
+    for player_id, code in player_codes.items():
+        player_id_of_code[code] = player_id
+    team_id_of_code = np.where(is_home_player, home_id, visitor_id)
+    sub_df = pd.DataFrame(
+        {
+            "player_id": player_id_of_code[stint_codes],
+            "team_id": team_id_of_code[stint_codes],
+            "time_in": stint_times_in,
+            "time_out": stint_times_out,
+        }
+    )
+
+    # %-style args keep this free when debug logging is disabled
+    logger.debug("Processed %d events into %d substitution stints", len(pbp_df), len(sub_df))
 
     return sub_df, pbp_df
 
@@ -171,70 +309,71 @@ def assign_players_on_court(sub_df: pd.DataFrame, pbp_df: pd.DataFrame, home_id:
         pd.DataFrame: Players on the court keyed by game ID and event number
     """
 
-    # Initialize player DataFrame
-    player_df = pd.DataFrame()
-    for index, row in pbp_df.iterrows():
-        # Loop through each team to get on-court players for each
-        for team_id, label_id in zip([home_id, visitor_id], ["home", "visitor"]):
-            # Isolate to the team of interest
-            team_sub_df = sub_df[sub_df["team_id"] == team_id]
-            # For end of period events, all players on the court come out, so we just need to filter
-            # on time_out == game_time_remaining
-            if row["eventmsgtype"] == 13:
-                on_court_players = team_sub_df[
-                    (team_sub_df["time_out"] == row["game_time_remaining"]) & (team_sub_df["time_in"] != team_sub_df["time_out"])
-                ]["player_id"].tolist()
-            # For substitutions, get the new players in
-            elif row["eventmsgtype"] == 8:
-                on_court_players = team_sub_df[
-                    (team_sub_df["time_in"] >= row["game_time_remaining"]) & (team_sub_df["time_out"] < row["game_time_remaining"])
-                ]["player_id"].tolist()
-                # This could be an end of period substitution, so shuffling in inequality here
-                if len(on_court_players) == 0:
-                    on_court_players = team_sub_df[
-                        (team_sub_df["time_in"] > row["game_time_remaining"]) & (team_sub_df["time_out"] <= row["game_time_remaining"])
-                    ]["player_id"].tolist()
-            # For all other events, filter on time_in and time_out surrounding the game time remaining
-            else:
-                if row["period"] <= 5 or (row["period"] >= 6 and row["pctimestring"] != "5:00"):
-                    on_court_players = team_sub_df[
-                        (team_sub_df["time_in"] >= row["game_time_remaining"]) & (team_sub_df["time_out"] <= row["game_time_remaining"])
-                    ]["player_id"]
-                else:
-                    on_court_players = team_sub_df[
-                            (team_sub_df["time_in"] >= row["game_time_remaining"]) & (team_sub_df["time_out"] < row["game_time_remaining"])
-                        ]["player_id"]
-                # If there are more than 5 players, this timestamp has multiple events occurring at the same time
-                # so this keeps the players on the court in based on the assumption that the substitution is the "last"
-                # event to occur at that timestamp
-                if len(on_court_players) > 5:
-                    on_court_players = team_sub_df[
-                        (team_sub_df["time_in"] > row["game_time_remaining"]) & (team_sub_df["time_out"] <= row["game_time_remaining"])
-                    ]["player_id"].tolist()
-                else:
-                    on_court_players = on_court_players.tolist()
-
-            if row["game_id"] == 1022500218 and row["period"] == 5 and len(on_court_players) < 5 and team_id == home_id:
-                on_court_players.append(1642800)
-
-            assert len(on_court_players) == 5, f"More than 5 players on court for team {team_id} at event {index}"
-            # Store the players on the court and merge / concat to keep track across the game for both teams
-            temp_df = pd.DataFrame(
-                {
-                    "game_id": [row["game_id"]],
-                    "eventnum": [row["eventnum"]],
-                    f"{label_id}_player_1": [on_court_players[0]],
-                    f"{label_id}_player_2": [on_court_players[1]],
-                    f"{label_id}_player_3": [on_court_players[2]],
-                    f"{label_id}_player_4": [on_court_players[3]],
-                    f"{label_id}_player_5": [on_court_players[4]]
-                }
+    # Pull the event-level columns out once
+    game_time_remaining = pbp_df["game_time_remaining"].to_numpy()[:, None]
+    eventmsgtype = pbp_df["eventmsgtype"].to_numpy()
+    period = pbp_df["period"].to_numpy()
+    pctimestring = pbp_df["pctimestring"].to_numpy()
+
+    # Partition the substitutions by team in a single pass
+    team_sub_dfs = dict(tuple(sub_df.groupby("team_id")))
+
+    # Collect the output columns across both teams and build the frame once
+    player_columns = {
+        "game_id": pbp_df["game_id"].to_numpy(),
+        "eventnum": pbp_df["eventnum"].to_numpy(),
+    }
+
+    # Loop through each team to get on-court players for each
+    for team_id, label_id in zip([home_id, visitor_id], ["home", "visitor"]):
+        # Isolate to the team of interest
+        team_sub_df = team_sub_dfs.get(team_id, sub_df.iloc[0:0])
+        time_in = team_sub_df["time_in"].to_numpy()[None, :]
+        time_out = team_sub_df["time_out"].to_numpy()[None, :]
+        player_ids = team_sub_df["player_id"].to_numpy()
+
+        # Compare every event time against every stint interval in one shot,
+        # giving an (events x stints) on-court mask per inequality flavor
+        closed = (time_in >= game_time_remaining) & (time_out <= game_time_remaining)
+        half_open = (time_in >= game_time_remaining) & (time_out < game_time_remaining)
+        late_sub = (time_in > game_time_remaining) & (time_out <= game_time_remaining)
+        period_end = (time_out == game_time_remaining) & (time_in != time_out)
+
+        # For all non-substitution events, filter on time_in and time_out surrounding
+        # the game time remaining, opening the time_out inequality at the start of overtimes
+        on_court = np.where(((period <= 5) | (pctimestring != "5:00"))[:, None], closed, half_open)
+        # If there are more than 5 players, this timestamp has multiple events occurring at the same time
+        # so this keeps the players on the court in based on the assumption that the substitution is the "last"
+        # event to occur at that timestamp
+        on_court = np.where((on_court.sum(axis=1) > 5)[:, None], late_sub, on_court)
+        # For substitutions, get the new players in; an empty match means an end of
+        # period substitution, so shuffle in the inequality there
+        sub_on_court = np.where((half_open.sum(axis=1) == 0)[:, None], late_sub, half_open)
+        on_court = np.where((eventmsgtype == 8)[:, None], sub_on_court, on_court)
+        # For end of period events, all players on the court come out, so we just need to filter
+        # on time_out == game_time_remaining
+        on_court = np.where((eventmsgtype == 13)[:, None], period_end, on_court)
+
+        if team_id == home_id:
+            patch_events = (
+                (pbp_df["game_id"].to_numpy() == 1022500218)
+                & (period == 5)
+                & (on_court.sum(axis=1) < 5)
             )
-            if label_id == "home":
-                row_df = temp_df
-            else:
-                row_df = row_df.merge(temp_df, on=["game_id", "eventnum"])
+            on_court = np.hstack([on_court, patch_events[:, None]])
+            player_ids = np.append(player_ids, 1642800)
+
+        counts = on_court.sum(axis=1)
+        bad_events = np.flatnonzero(counts != 5)
+        assert bad_events.size == 0, f"More than 5 players on court for team {team_id} at event {bad_events[0] if bad_events.size else None}"
+
+        # One row per (event, on-court player), in stint order within each event
+        _, stint_idx = np.nonzero(on_court)
+        players_wide = player_ids[stint_idx].reshape(len(pbp_df), 5)
+
+        for slot in range(1, 6):
+            player_columns[f"{label_id}_player_{slot}"] = players_wide[:, slot - 1]
 
-        player_df = pd.concat([player_df, row_df], ignore_index=True)
+    player_df = pd.DataFrame(player_columns)
 
     return player_df
\ No newline at end of file